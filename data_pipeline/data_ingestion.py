@@ -2,40 +2,65 @@
 
 import argparse
 import asyncio
-import json
 import logging
 from pathlib import Path
-from typing import Any, Dict, List, TypedDict, cast
+from typing import Any, Dict
 
 import duckdb
 import httpx
+import orjson
 import pyarrow as pa
 import pyarrow.parquet as pq
-from rich.console import Console
 from rich.progress import Progress
-from tqdm import tqdm
 
-from .utils import console, log_step, log_success, read_sql_file
+from .utils import DB_PATH, log_step, log_success, read_sql_file
 
 # Configure logging
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
-DB_PATH = "persons.duckdb"
 TABLE_NAME = "persons"
 API_URL = "https://fakerapi.it/api/v2/persons"
 BATCH_SIZE = 1000
-
-
-class PersonData(TypedDict):
-    id: int
-    firstname: str
-    lastname: str
-    email_provider: str
-    phone: str
-    birthday: str
-    gender: str
-    address: Dict[str, str]
+# The Faker API silently caps _quantity at this many records per request
+MAX_BATCH_SIZE = 1000
+MAX_CONCURRENT_REQUESTS = 32
+
+# Each batch is written as it arrives, so memory stays bounded to one batch;
+# row groups are capped at this size and low-cardinality columns are
+# dictionary encoded.
+PARQUET_ROW_GROUP_SIZE = 128 * 1024
+PARQUET_WRITE_OPTIONS: Dict[str, Any] = {
+    "compression": "zstd",
+    "compression_level": 3,
+    "use_dictionary": ["gender", "address_country"],
+    "data_page_size": 1024 * 1024,
+    "write_statistics": True,
+}
+
+ADDRESS_FIELDS = ["street", "city", "zipcode", "country"]
+
+# Explicit schema so each batch converts without type inference; fields the
+# API returns that are not listed here are dropped at conversion time.
+API_PERSON_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("firstname", pa.string()),
+        ("lastname", pa.string()),
+        ("email", pa.string()),
+        ("phone", pa.string()),
+        ("birthday", pa.string()),
+        ("gender", pa.string()),
+        ("address", pa.struct([(name, pa.string()) for name in ADDRESS_FIELDS])),
+    ]
+)
+
+# Schema written to parquet: the nested address is flattened into top-level
+# address_* columns so readers never walk struct child buffers.
+PERSON_SCHEMA = pa.schema(
+    [field for field in API_PERSON_SCHEMA if field.name != "address"]
+    + [(f"address_{name}", pa.string()) for name in ADDRESS_FIELDS]
+)
 
 
 class DataFetcher:
@@ -57,21 +82,18 @@ class DataFetcher:
 
         self.total = total
         self.gender = gender
-        self.batch_size = batch_size
+        if batch_size > MAX_BATCH_SIZE:
+            logger.warning(
+                f"Batch size {batch_size} exceeds the API limit, "
+                f"using {MAX_BATCH_SIZE} instead"
+            )
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
         self.base_url = API_URL
-        self.progress_bar = tqdm(
-            total=total,
-            desc="Fetching records",
-            unit="records",
-            unit_scale=True,
-            ncols=80,
-            bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]",
-        )
 
     async def _fetch_batch(
         self, client: httpx.AsyncClient, batch_id: int
-    ) -> List[Dict[str, Any]]:
-        """Fetch a batch of fake data with retries."""
+    ) -> pa.RecordBatch:
+        """Fetch a batch of fake data with retries as an Arrow record batch."""
         max_retries = 3
         retry_delay = 1
 
@@ -87,52 +109,79 @@ class DataFetcher:
                     timeout=20.0,
                 )
                 response.raise_for_status()
-                data = response.json()
-                return cast(List[Dict[str, Any]], data["data"])
+                data = orjson.loads(response.content)
+                batch = pa.RecordBatch.from_pylist(
+                    data["data"], schema=API_PERSON_SCHEMA
+                )
+                address = batch.column("address")
+                return pa.RecordBatch.from_arrays(
+                    batch.columns[:-1] + address.flatten(), schema=PERSON_SCHEMA
+                )
             except Exception as e:
                 if attempt == max_retries - 1:
                     raise
                 await asyncio.sleep(retry_delay * (attempt + 1))
-        return []  # Return empty list if all retries fail
+        # Return an empty batch if all retries fail
+        return pa.RecordBatch.from_pylist([], schema=PERSON_SCHEMA)
+
+    async def fetch_persons(self, output_path: Path) -> int:
+        """Fetch all persons data in batches, streaming each batch to parquet.
 
-    async def fetch_persons(self) -> List[Dict[str, Any]]:
-        """Fetch all persons data in batches."""
+        Returns the number of records written to ``output_path``.
+        """
         num_batches = (self.total + self.batch_size - 1) // self.batch_size
-        results: List[Dict[str, Any]] = []
-
-        async with httpx.AsyncClient(
-            timeout=30.0,
-            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
-        ) as client:
-            with Progress() as progress:
-                task = progress.add_task("[cyan]Fetching data...", total=num_batches)
-
-                tasks = [
-                    self._fetch_batch(client=client, batch_id=batch_id)
-                    for batch_id in range(num_batches)
-                ]
-
-                for result in asyncio.as_completed(tasks):
-                    try:
-                        batch_data = await result
-                        results.extend(batch_data)
+        written = 0
+
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        writer = pq.ParquetWriter(output_path, PERSON_SCHEMA, **PARQUET_WRITE_OPTIONS)
+
+        try:
+            async with httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(30.0, connect=10.0),
+                limits=httpx.Limits(
+                    max_keepalive_connections=MAX_CONCURRENT_REQUESTS,
+                    max_connections=MAX_CONCURRENT_REQUESTS,
+                ),
+            ) as client:
+                with Progress() as progress:
+                    task = progress.add_task(
+                        "[cyan]Fetching data...", total=num_batches
+                    )
+
+                    async def fetch_and_write(batch_id: int) -> None:
+                        nonlocal written
+                        async with semaphore:
+                            batch = await self._fetch_batch(
+                                client=client, batch_id=batch_id
+                            )
+                        # Writes run on the event loop, so they never interleave
+                        batch = batch.slice(0, self.total - written)
+                        writer.write_batch(batch, row_group_size=PARQUET_ROW_GROUP_SIZE)
+                        written += batch.num_rows
                         progress.advance(task)
-                    except Exception as e:
-                        logger.error(f"Batch failed: {str(e)}", exc_info=True)
 
-        return results[: self.total] if results else []
+                    outcomes = await asyncio.gather(
+                        *(fetch_and_write(batch_id) for batch_id in range(num_batches)),
+                        return_exceptions=True,
+                    )
+        finally:
+            writer.close()
 
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                logger.error(f"Batch failed: {str(outcome)}", exc_info=outcome)
 
-def setup_database() -> None:
-    """Set up the DuckDB database and create the table if it doesn't exist."""
+        return written
+
+
+def setup_database(conn: duckdb.DuckDBPyConnection) -> None:
+    """Create the persons table on the given connection if it doesn't exist."""
     log_step(f"Setting up database at {DB_PATH}")
 
     # Read and execute create tables SQL
-    create_tables_sql = read_sql_file(Path("data_pipeline/sql/create_tables.sql"))
-
-    conn = duckdb.connect(DB_PATH)
+    create_tables_sql = read_sql_file("create_tables.sql")
     conn.execute(create_tables_sql)
-    conn.close()
 
     log_success("Database setup complete")
 
@@ -156,46 +205,53 @@ async def main() -> None:
         f"Batch size={args.batch_size}, Total records={args.total}"
     )
 
+    # One connection serves both setup and load for the whole run
+    conn = duckdb.connect(DB_PATH)
+
     try:
         # Set up database
-        setup_database()
+        setup_database(conn)
+
+        # Fetch data, streaming each batch to parquet as it arrives
+        log_step("Fetching raw data into parquet...")
+        raw_data_path = Path("raw_data")
+        raw_data_path.mkdir(exist_ok=True)
 
-        # Fetch data
         fetcher = DataFetcher(
             total=args.total, gender=args.gender, batch_size=args.batch_size
         )
-        persons = await fetcher.fetch_persons()
+        num_records = await fetcher.fetch_persons(raw_data_path / "persons.parquet")
 
-        if not persons:
+        if num_records == 0:
             raise ValueError("No valid data fetched from API")
 
-        # Save raw data to parquet
-        log_step("Saving raw data to parquet...")
-        raw_data_path = Path("raw_data")
-        raw_data_path.mkdir(exist_ok=True)
-
-        table = pa.Table.from_pylist(persons)
-        pq.write_table(table, raw_data_path / "persons.parquet")
         log_success("Raw data saved to parquet")
 
         # Insert masked data into DuckDB from parquet
         log_step("Loading and masking data into DuckDB...")
-        conn = duckdb.connect(DB_PATH)
-
-        insert_sql = read_sql_file(Path("data_pipeline/sql/insert_raw_data.sql"))
+        insert_sql = read_sql_file("insert_raw_data.sql")
         conn.execute(insert_sql)
-        conn.close()
 
-        log_success(f"Successfully processed {len(persons)} records")
+        log_success(f"Successfully processed {num_records} records")
 
     except Exception as e:
         logger.error(f"Error during data ingestion: {str(e)}", exc_info=True)
         raise
 
+    finally:
+        conn.close()
+
 
 def run_async_main() -> None:
-    """Run the async main function."""
-    asyncio.run(main())
+    """Run the async main function, on uvloop when it is available."""
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+        return
+
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        runner.run(main())
 
 
 if __name__ == "__main__":
@@ -1,7 +1,6 @@
 CREATE TABLE IF NOT EXISTS persons (
     id INTEGER PRIMARY KEY,
     age INTEGER,
-    age_group VARCHAR,
     email_provider VARCHAR,
     masked_name VARCHAR,
     masked_contact VARCHAR,
@@ -15,4 +14,3 @@ CREATE TABLE IF NOT EXISTS persons (
 -- Create indexes for commonly queried fields
 CREATE INDEX IF NOT EXISTS idx_email_provider ON persons(email_provider);
 CREATE INDEX IF NOT EXISTS idx_country ON persons(country);
-CREATE INDEX IF NOT EXISTS idx_age_group ON persons(age_group);
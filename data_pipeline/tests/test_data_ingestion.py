@@ -1,11 +1,23 @@
-from typing import Any, Dict, List
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 from unittest.mock import AsyncMock, MagicMock
 
+import duckdb
 import httpx
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 from pytest import FixtureRequest, MonkeyPatch
 
-from data_pipeline.data_ingestion import DataFetcher
+from data_pipeline.data_ingestion import (
+    MAX_BATCH_SIZE,
+    PERSON_SCHEMA,
+    DataFetcher,
+    setup_database,
+)
+from data_pipeline.utils import read_sql_file
 
 
 @pytest.fixture
@@ -67,7 +79,7 @@ async def test_fetch_batch() -> None:
     # Create mock response
     mock_response = MagicMock()
     mock_response.raise_for_status = MagicMock()
-    mock_response.json = lambda: mock_response_data
+    mock_response.content = orjson.dumps(mock_response_data)
 
     # Create mock client
     mock_client = AsyncMock()
@@ -80,9 +92,11 @@ async def test_fetch_batch() -> None:
     batch_data = await fetcher._fetch_batch(client=mock_client, batch_id=1)
 
     # Assertions
-    assert isinstance(batch_data, list)
-    assert len(batch_data) == 1
-    assert batch_data[0]["firstname"] == "Clark"
+    assert isinstance(batch_data, pa.RecordBatch)
+    assert batch_data.schema == PERSON_SCHEMA
+    assert batch_data.num_rows == 1
+    assert batch_data.column("firstname").to_pylist() == ["Clark"]
+    assert batch_data.column("address_country").to_pylist() == ["USA"]
 
     # Verify the API was called with correct parameters
     mock_client.get.assert_called_once_with(
@@ -97,13 +111,169 @@ async def test_fetch_batch() -> None:
 
 
 @pytest.mark.asyncio
-async def test_fetch_persons() -> None:
-    """Test fetching all persons."""
+async def test_fetch_persons(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    """Test fetching all persons into a parquet file."""
+    monkeypatch.setattr(
+        "data_pipeline.data_ingestion.httpx.AsyncClient", mock_async_client()
+    )
     fetcher = DataFetcher(total=20, gender="male", batch_size=10)
-    result = await fetcher.fetch_persons()
-    assert isinstance(result, list)
-    assert len(result) > 0
-    assert isinstance(result[0], dict)
+    output_path = tmp_path / "persons.parquet"
+    num_records = await fetcher.fetch_persons(output_path)
+    assert num_records == 20
+    result = pq.read_table(output_path)
+    assert result.num_rows == num_records
+    assert result.schema == PERSON_SCHEMA
+
+
+def mock_async_client(failing_seed: Optional[int] = None) -> MagicMock:
+    """Build a mocked httpx.AsyncClient class serving fake API pages offline.
+
+    Each request returns ``_quantity`` persons with ids unique per seed; the
+    request for ``failing_seed`` always raises.
+    """
+
+    async def get(url: str, params: Dict[str, Any], timeout: float) -> MagicMock:
+        seed, quantity = params["_seed"], params["_quantity"]
+        if seed == failing_seed:
+            raise httpx.ConnectError("connection refused")
+        response = MagicMock()
+        response.content = orjson.dumps(
+            {
+                "status": "OK",
+                "code": 200,
+                "data": [
+                    {
+                        "id": seed * quantity + offset,
+                        "firstname": "Clark",
+                        "lastname": "Kent",
+                        "email": "clark.kent@example.com",
+                        "phone": "1234567890",
+                        "birthday": "1990-01-01",
+                        "gender": params["gender"],
+                        "address": {
+                            "street": "Main St",
+                            "city": "Metropolis",
+                            "zipcode": "12345",
+                            "country": "USA",
+                        },
+                    }
+                    for offset in range(quantity)
+                ],
+            }
+        )
+        return response
+
+    client = MagicMock()
+    client.get = AsyncMock(side_effect=get)
+    client_class = MagicMock()
+    client_class.return_value.__aenter__ = AsyncMock(return_value=client)
+    client_class.return_value.__aexit__ = AsyncMock(return_value=None)
+    return client_class
+
+
+@pytest.mark.asyncio
+async def test_fetch_persons_trims_to_total(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    """Test a total that is not a multiple of the batch size is written exactly."""
+    monkeypatch.setattr(
+        "data_pipeline.data_ingestion.httpx.AsyncClient", mock_async_client()
+    )
+    fetcher = DataFetcher(total=25, gender="male", batch_size=10)
+    output_path = tmp_path / "persons.parquet"
+
+    num_records = await fetcher.fetch_persons(output_path)
+
+    result = pq.read_table(output_path)
+    assert num_records == 25
+    assert result.num_rows == num_records
+    assert result.schema == PERSON_SCHEMA
+    assert len(set(result.column("id").to_pylist())) == 25
+
+
+@pytest.mark.asyncio
+async def test_fetch_persons_skips_failed_batch(
+    tmp_path: Path, monkeypatch: MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test a batch failing every retry is logged and the others still land."""
+    monkeypatch.setattr(
+        "data_pipeline.data_ingestion.httpx.AsyncClient",
+        mock_async_client(failing_seed=1),
+    )
+    monkeypatch.setattr("data_pipeline.data_ingestion.asyncio.sleep", AsyncMock())
+    fetcher = DataFetcher(total=30, gender="male", batch_size=10)
+    output_path = tmp_path / "persons.parquet"
+
+    num_records = await fetcher.fetch_persons(output_path)
+
+    result = pq.read_table(output_path)
+    assert num_records == 20
+    assert result.num_rows == num_records
+    assert result.schema == PERSON_SCHEMA
+    assert sorted(result.column("id").to_pylist()) == list(range(10)) + list(
+        range(20, 30)
+    )
+    assert "Batch failed: connection refused" in caplog.text
+
+
+def birthday_for(age: int, days_ahead: int = 0) -> str:
+    """Return the ISO birthday of someone turning ``age`` in ``days_ahead`` days."""
+    today = date.today()
+    try:
+        anniversary = today.replace(year=today.year - age)
+    except ValueError:  # Today is Feb 29
+        anniversary = today.replace(year=today.year - age, day=28)
+    return (anniversary + timedelta(days=days_ahead)).isoformat()
+
+
+def test_insert_raw_data(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    """Test loading parquet into persons computes completed ages and dedupes ids."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "raw_data").mkdir()
+    address = {
+        "address_street": "Main St",
+        "address_city": "Metropolis",
+        "address_zipcode": "12345",
+        "address_country": "USA",
+    }
+    rows = [
+        # Birthday is tomorrow, so the 30th has not been reached yet
+        {"id": 1, "birthday": birthday_for(30, days_ahead=1)},
+        {"id": 2, "birthday": birthday_for(45)},
+        {"id": 2, "birthday": birthday_for(45)},
+        {"id": 3, "birthday": birthday_for(60)},
+    ]
+    pq.write_table(
+        pa.Table.from_pylist(
+            [
+                {
+                    "firstname": "Clark",
+                    "lastname": "Kent",
+                    "email": "clark.kent@gmail.com",
+                    "phone": "1234567890",
+                    "gender": "male",
+                    **address,
+                    **row,
+                }
+                for row in rows
+            ],
+            schema=PERSON_SCHEMA,
+        ),
+        tmp_path / "raw_data" / "persons.parquet",
+    )
+
+    with duckdb.connect(":memory:") as conn:
+        setup_database(conn)
+        conn.execute(read_sql_file("insert_raw_data.sql"))
+        persons = conn.execute(
+            "SELECT id, age, email_provider, masked_zipcode " "FROM persons ORDER BY id"
+        ).fetchall()
+
+    assert persons == [
+        (1, 29, "gmail.com", "12***"),
+        (2, 45, "gmail.com", "12***"),
+        (3, 60, "gmail.com", "12***"),
+    ]
 
 
 def test_data_fetcher_init() -> None:
@@ -118,6 +288,12 @@ def test_data_fetcher_init() -> None:
     assert fetcher.batch_size == 50
 
 
+def test_data_fetcher_caps_batch_size() -> None:
+    """Test DataFetcher clamps batch size to the API limit."""
+    fetcher = DataFetcher(total=5000, gender="male", batch_size=5000)
+    assert fetcher.batch_size == MAX_BATCH_SIZE
+
+
 @pytest.mark.asyncio
 async def test_data_fetcher_with_invalid_params() -> None:
     """Test DataFetcher with invalid parameters."""
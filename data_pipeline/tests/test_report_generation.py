@@ -21,16 +21,19 @@ class TestReportGeneration(unittest.TestCase):
 
         # Mock the fetchone results for each query
         mock_cursor.fetchone.side_effect = [
-            (100,),  # Total records
-            (0.9,),  # Completeness for email_provider
-            (0.8,),  # Uniqueness for email_provider
-            (0.95,),  # Format validity for email_provider
-            (0.85,),  # Completeness for country
-            (0.75,),  # Uniqueness for country
-            (0.9,),  # Format validity for country
-            (0.8,),  # Completeness for age_group
-            (0.7,),  # Uniqueness for age_group
-            (0.85,),  # Format validity for age_group
+            (
+                100,  # Total records
+                95,  # Valid records
+                0.9,  # Completeness for email_provider
+                0.8,  # Uniqueness for email_provider
+                0.95,  # Format validity for email_provider
+                0.85,  # Completeness for country
+                0.75,  # Uniqueness for country
+                0.9,  # Format validity for country
+                0.8,  # Completeness for age_group
+                0.7,  # Uniqueness for age_group
+                0.85,  # Format validity for age_group
+            ),
         ]
 
         # Call the function
@@ -38,9 +41,16 @@ class TestReportGeneration(unittest.TestCase):
 
         # Assertions
         self.assertEqual(metrics.total_records, 100)
+        self.assertEqual(metrics.valid_records, 95)
         self.assertAlmostEqual(metrics.completeness["email_provider"], 0.9)
         self.assertAlmostEqual(metrics.uniqueness["email_provider"], 0.8)
         self.assertAlmostEqual(metrics.format_validity["email_provider"], 0.95)
+        self.assertAlmostEqual(metrics.completeness["age_group"], 0.8)
+        self.assertAlmostEqual(metrics.format_validity["age_group"], 0.85)
+        self.assertAlmostEqual(metrics.overall_score, 0.85)
+
+        # All metrics come from a single precomputed row
+        mock_conn.execute.assert_called_once()
 
     @patch("data_pipeline.report_generation.Path.exists", return_value=True)
     @patch("data_pipeline.report_generation.Console")
@@ -60,26 +70,26 @@ class TestReportGeneration(unittest.TestCase):
 
         # Mock the database queries
         mock_conn.execute.return_value.fetchone.side_effect = [
-            (1,),  # Test connection
-            (100,),  # Total records
-            (0.9,),  # Completeness for email_provider
-            (0.8,),  # Uniqueness for email_provider
-            (0.95,),  # Format validity for email_provider
-            (0.85,),  # Completeness for country
-            (0.75,),  # Uniqueness for country
-            (0.9,),  # Format validity for country
-            (0.8,),  # Completeness for age_group
-            (0.7,),  # Uniqueness for age_group
-            (0.85,),  # Format validity for age_group
-            (50.0,),  # Gmail percentage in Germany
-            (10, 100, 10.0),  # Gmail users over 60
-        ]
-
-        # Mock the fetchall for top countries
-        mock_conn.execute.return_value.fetchall.return_value = [
-            ("Country1", 1000),
-            ("Country2", 800),
-            ("Country3", 600),
+            (
+                100,  # Total records
+                95,  # Valid records
+                0.9,  # Completeness for email_provider
+                0.8,  # Uniqueness for email_provider
+                0.95,  # Format validity for email_provider
+                0.85,  # Completeness for country
+                0.75,  # Uniqueness for country
+                0.9,  # Format validity for country
+                0.8,  # Completeness for age_group
+                0.7,  # Uniqueness for age_group
+                0.85,  # Format validity for age_group
+                50.0,  # Gmail percentage in Germany
+                10.0,  # Gmail percentage over 60
+                [
+                    {"country": "Country1", "gmail_users": 1000},
+                    {"country": "Country2", "gmail_users": 800},
+                    {"country": "Country3", "gmail_users": 600},
+                ],  # Top countries by Gmail usage
+            ),
         ]
 
         # Call the function
@@ -87,6 +97,9 @@ class TestReportGeneration(unittest.TestCase):
 
         # Assertions
         mock_console_instance.print.assert_called()  # Check if console print was called
+        mock_connect.assert_called_once_with("persons.duckdb", read_only=True)
+        # Quality metrics and analytics arrive in a single round trip
+        mock_conn.execute.assert_called_once()
 
 
 if __name__ == "__main__":
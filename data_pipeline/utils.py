@@ -1,7 +1,8 @@
 """Consolidated utilities for the data pipeline."""
 import logging
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Optional, Tuple, Union
 
 from rich.console import Console
 from rich.logging import RichHandler
@@ -15,11 +16,24 @@ logging.basicConfig(
 logger = logging.getLogger("data_pipeline")
 console = Console()
 
+# DuckDB file shared by ingestion, dbt and reporting
+DB_PATH = "persons.duckdb"
+SQL_DIR = Path(__file__).parent / "sql"
 
-def read_sql_file(path: Path) -> str:
-    """Read SQL file content."""
-    with open(path, "r") as f:
-        return f.read()
+
+def read_sql_file(name_or_path: Union[str, Path]) -> str:
+    """Read SQL file content, caching it for the life of the process.
+
+    Relative paths are resolved against the package's ``sql`` directory, so
+    callers can pass a bare file name regardless of the working directory.
+    """
+    # Key the cache on the absolute path so equivalent spellings share an entry
+    return _read_sql_text((SQL_DIR / name_or_path).resolve())
+
+
+@lru_cache(maxsize=None)
+def _read_sql_text(path: Path) -> str:
+    return path.read_text(encoding="utf-8")
 
 
 def safe_fetch_value(result: Optional[Tuple[Any, ...]], index: int = 0) -> float:
@@ -31,14 +45,18 @@ def safe_fetch_value(result: Optional[Tuple[Any, ...]], index: int = 0) -> float
 
 def log_step(step_name: str) -> None:
     """Log a pipeline step with rich formatting."""
-    console.print(f"\n[bold blue]Running {step_name}...[/bold blue]")
+    # Skip Rich rendering when the pipeline logger would discard the message
+    if logger.isEnabledFor(logging.INFO):
+        console.print(f"\n[bold blue]Running {step_name}...[/bold blue]")
 
 
 def log_success(message: str) -> None:
     """Log a success message with rich formatting."""
-    console.print(f"[bold green]✓ {message}[/bold green]")
+    if logger.isEnabledFor(logging.INFO):
+        console.print(f"[bold green]✓ {message}[/bold green]")
 
 
 def log_error(message: str) -> None:
     """Log an error message with rich formatting."""
-    console.print(f"[bold red]✗ {message}[/bold red]")
+    if logger.isEnabledFor(logging.ERROR):
+        console.print(f"[bold red]✗ {message}[/bold red]")
@@ -0,0 +1,11 @@
+{{ config(materialized='table') }}
+
+-- All report analytics in a single row so the report fetches them in one call
+SELECT
+    (SELECT gmail_percentage FROM {{ ref('persons_email_usage') }}) AS gmail_percentage_germany,
+    (SELECT gmail_percentage FROM {{ ref('persons_age_groups') }}) AS gmail_percentage_over_60,
+    (
+        SELECT list({'country': country, 'gmail_users': gmail_users} ORDER BY gmail_users DESC, country)[1:3]
+        FROM {{ ref('persons_location') }}
+        WHERE rank <= 3
+    ) AS top_countries
@@ -0,0 +1,28 @@
+{{ config(materialized='table') }}
+
+-- Data quality aggregates over stg_persons, computed once per dbt run so
+-- reports read a single precomputed row instead of rescanning the staging data.
+-- Age group validity uses plain string predicates, which beat regexp_matches;
+-- email domains keep the regex since a cheap check cannot validate the TLD.
+SELECT
+    COUNT(*) AS total_records,
+    COUNT(CASE WHEN email_provider IS NOT NULL AND country IS NOT NULL AND age_group IS NOT NULL
+        THEN 1 END) AS valid_records,
+
+    COUNT(email_provider)::FLOAT / NULLIF(COUNT(*), 0) AS email_provider_completeness,
+    COUNT(DISTINCT email_provider)::FLOAT / NULLIF(COUNT(email_provider), 0) AS email_provider_uniqueness,
+    SUM(CASE WHEN regexp_matches(email_provider, '^[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+        THEN 1 ELSE 0 END)::FLOAT / NULLIF(COUNT(*), 0) AS email_provider_validity,
+
+    COUNT(country)::FLOAT / NULLIF(COUNT(*), 0) AS country_completeness,
+    COUNT(DISTINCT country)::FLOAT / NULLIF(COUNT(country), 0) AS country_uniqueness,
+    SUM(CASE WHEN LENGTH(country) > 0 AND NOT regexp_matches(country, '^[0-9]+$')
+        THEN 1 ELSE 0 END)::FLOAT / NULLIF(COUNT(*), 0) AS country_validity,
+
+    COUNT(age_group)::FLOAT / NULLIF(COUNT(*), 0) AS age_group_completeness,
+    COUNT(DISTINCT age_group)::FLOAT / NULLIF(COUNT(age_group), 0) AS age_group_uniqueness,
+    SUM(CASE WHEN starts_with(age_group, '[')
+            AND ends_with(age_group, ']')
+            AND (contains(age_group, '-') OR age_group = '[60+]')
+        THEN 1 ELSE 0 END)::FLOAT / NULLIF(COUNT(*), 0) AS age_group_validity
+FROM {{ ref('stg_persons') }}